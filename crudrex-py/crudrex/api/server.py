@@ -1,15 +1,32 @@
+import time
+
+# Taken before the heavier imports below, so startup time includes importing Flask
+IMPORT_STARTED = time.perf_counter()
+
 import os
 import json
 import uuid
-from flask import Flask, request, jsonify, abort, render_template, send_from_directory
+import copy
+from contextlib import contextmanager, nullcontext
+from flask import Flask, request, jsonify, abort, render_template, send_from_directory, has_request_context, g
 from flask_cors import CORS
 import threading
-import webbrowser
-import time
 import logging
+from .storage import CompactCollection
+from .tenants import Tenant, TenantMiddleware, TENANTS_DIR, is_valid_name
 
 class MockServer:
-    def __init__(self, data_dir="data", port=8085):
+    def __init__(self, data_dir="data", port=8085, compact=False, tenant_quota=None, record=None,
+                 startup_budget_ms=None):
+        # The first server measures startup from module import, later ones from their creation
+        global IMPORT_STARTED
+        self.started_at = IMPORT_STARTED or time.perf_counter()
+        IMPORT_STARTED = None
+        self.startup_ms = None
+        self.startup_budget_ms = startup_budget_ms
+        self.load_error = None
+        self.http_server = None
+        
         # Configure Flask to look for templates in the correct directory
         template_dir = os.path.join(os.path.dirname(__file__), 'templates')
         static_dir = os.path.join(os.path.dirname(__file__), 'static')
@@ -17,13 +34,168 @@ class MockServer:
         self.app = Flask(__name__, template_folder=template_dir)
         # Fix CORS with proper configuration
         CORS(self.app, resources={r"/*": {"origins": "*"}})
-        self.data_dir = data_dir
+        # Select the tenant from the X-Crudrex-Tenant header or /_tenants/<name>/ prefix
+        self.app.wsgi_app = TenantMiddleware(self.app.wsgi_app)
         self.port = port
-        self.collections = {}
+        self.compact = compact
+        self.tenant_quota = tenant_quota
+        self.default_tenant = Tenant(None, data_dir)
+        self.tenants = {}
+        self.tenants_lock = threading.Lock()
+        self._local = threading.local()
+        # Collections are loaded on first use (or in the background by run())
         self.setup_directories()
-        self.load_collections()
+        self.record_file = None
+        if record:
+            self.setup_recording(record)
         self.setup_routes()
         
+    @property
+    def tenant(self):
+        """Tenant whose collections the server is currently working with"""
+        tenant = getattr(self._local, 'tenant', None)
+        if tenant is not None:
+            return tenant
+        if has_request_context():
+            tenant = g.get('tenant')
+            if tenant is not None:
+                return tenant
+            name = request.environ.get('crudrex.tenant')
+            if name:
+                return self.get_tenant(name)
+        return self.default_tenant
+        
+    @property
+    def data_dir(self):
+        return self.tenant.data_dir
+        
+    @property
+    def collections(self):
+        tenant = self.tenant
+        if not tenant.loaded:
+            self.load_tenant(tenant)
+        return tenant.collections
+        
+    @collections.setter
+    def collections(self, value):
+        self.tenant.collections = value
+        
+    @property
+    def snapshots(self):
+        return self.tenant.snapshots
+        
+    @property
+    def shared_collections(self):
+        return self.tenant.shared_collections
+        
+    @shared_collections.setter
+    def shared_collections(self, value):
+        self.tenant.shared_collections = value
+        
+    @contextmanager
+    def use_tenant(self, name):
+        """Work with a tenant's collections from Python, e.g. to snapshot or restore them"""
+        previous = getattr(self._local, 'tenant', None)
+        self._local.tenant = self.get_tenant(name) if name else self.default_tenant
+        try:
+            yield self._local.tenant
+        finally:
+            self._local.tenant = previous
+            
+    def get_tenant(self, name):
+        """Return a tenant, creating it if needed; its collections are loaded on first use"""
+        if not is_valid_name(name):
+            raise ValueError(f"Invalid tenant name: {name!r}")
+            
+        with self.tenants_lock:
+            if name not in self.tenants:
+                self.tenants[name] = Tenant(name, os.path.join(self.default_tenant.data_dir, TENANTS_DIR, name))
+            return self.tenants[name]
+            
+    def drop_tenant(self, name):
+        """Delete a tenant and its stored data"""
+        if not is_valid_name(name):
+            raise ValueError(f"Invalid tenant name: {name!r}")
+            
+        with self.tenants_lock:
+            tenant = self.tenants.pop(name, None)
+        data_dir = os.path.join(self.default_tenant.data_dir, TENANTS_DIR, name)
+        if tenant is None and not os.path.exists(data_dir):
+            raise KeyError(name)
+            
+        # Wait for requests still changing the tenant before removing its files
+        with tenant.lock if tenant is not None else nullcontext():
+            if tenant is not None:
+                tenant.dropped = True
+            if os.path.exists(data_dir):
+                import shutil
+                shutil.rmtree(data_dir)
+                
+    def has_collection_files(self):
+        """Check whether the current data directory contains any collection files"""
+        if not os.path.isdir(self.data_dir):
+            return False
+        return any(filename.endswith('.json') for filename in os.listdir(self.data_dir))
+        
+    def load_tenant(self, tenant):
+        """Load a tenant's collections from disk or seed them from the default collections"""
+        with tenant.lock:
+            # Loading reads collections through the properties, so guard against re-entry
+            if tenant.loaded or tenant.loading:
+                return
+            tenant.loading = True
+            previous = getattr(self._local, 'tenant', None)
+            self._local.tenant = tenant
+            try:
+                if tenant.name is None or self.has_collection_files():
+                    self.load_collections()
+                else:
+                    # Share the default collections; they are copied on their next write.
+                    # The tenant directory is created when the tenant first saves.
+                    base = self.default_tenant
+                    self.load_tenant(base)
+                    # Lock order is always tenant, then base
+                    with base.lock:
+                        tenant.collections = dict(base.collections)
+                        tenant.shared_collections = set(base.collections)
+                        base.shared_collections.update(base.collections)
+                        base.owned_items = {}
+                tenant.loaded = True
+            except Exception as e:
+                tenant.collections = {}
+                if tenant is self.default_tenant:
+                    self.load_error = e
+                raise
+            finally:
+                tenant.loading = False
+                self._local.tenant = previous
+                
+        if tenant is self.default_tenant and self.startup_ms is None:
+            self.load_error = None
+            self.startup_ms = (time.perf_counter() - self.started_at) * 1000
+            if self.startup_budget_ms is not None and self.startup_ms > self.startup_budget_ms:
+                logging.getLogger(__name__).warning(
+                    "Startup took %.1f ms, over the budget of %.1f ms", self.startup_ms, self.startup_budget_ms)
+                
+    def load_in_background(self):
+        """Load the default collections, stopping the HTTP server if that fails"""
+        try:
+            self.load_tenant(self.default_tenant)
+        except Exception:
+            # load_tenant stored the error; run() re-raises it once the server stops
+            if self.http_server is not None:
+                self.http_server.shutdown()
+            
+    def collection_quota_reached(self):
+        """Check whether the current tenant has used up its collection quota"""
+        if self.tenant.name is None or self.tenant_quota is None:
+            return False
+        # Collections inherited from the default set do not count
+        base = self.default_tenant
+        self.load_tenant(base)
+        own = [name for name in self.collections if name not in base.collections]
+        return len(own) >= self.tenant_quota
+        
     def setup_directories(self):
         """Create necessary directories"""
         if not os.path.exists(self.data_dir):
@@ -35,7 +207,10 @@ class MockServer:
             for filename in os.listdir(self.data_dir):
                 if filename.endswith('.json'):
                     collection_name = filename[:-5]  # Remove .json extension
-                    self.collections[collection_name] = self.load_collection_data(collection_name)
+                    data = self.load_collection_data(collection_name)
+                    if self.compact and isinstance(data, dict):
+                        data = CompactCollection(data)
+                    self.collections[collection_name] = data
                     
     def load_collection_data(self, collection_name):
         """Load data for a specific collection"""
@@ -45,17 +220,145 @@ class MockServer:
                 return json.load(f)
         return {}
         
+    def new_collection(self):
+        """Create an empty collection using the configured storage"""
+        if self.compact:
+            return CompactCollection()
+        return {}
+        
+    def writable_collection(self, collection_name):
+        """Return a collection that is safe to modify, copying it if a snapshot shares it"""
+        collections = self.collections
+        if collection_name in self.shared_collections:
+            # Copy only the mapping; items are copied one by one in writable_item()
+            collections[collection_name] = collections[collection_name].copy()
+            self.shared_collections.discard(collection_name)
+            self.tenant.owned_items[collection_name] = set()
+        return collections[collection_name]
+        
+    def writable_item(self, collection_name, item_id):
+        """Return an item that is safe to modify in place, copying it if a snapshot shares it"""
+        collection = self.writable_collection(collection_name)
+        owned = self.tenant.owned_items.get(collection_name)
+        if owned is not None and item_id not in owned:
+            collection[item_id] = copy.deepcopy(collection[item_id])
+            owned.add(item_id)
+        return collection[item_id]
+        
+    def write_collection_file(self, collection_name):
+        """Write a single collection to its file"""
+        self.setup_directories()
+        filepath = os.path.join(self.data_dir, f"{collection_name}.json")
+        data = self.collections[collection_name]
+        with open(filepath, 'w') as f:
+            if isinstance(data, CompactCollection):
+                # Stream compact collections instead of building a full dict copy
+                data.write_json(f)
+            else:
+                json.dump(data, f, indent=2)
+        
     def save_all_collections(self):
         """Save all collections to their respective files"""
-        for collection_name in self.collections:
-            filepath = os.path.join(self.data_dir, f"{collection_name}.json")
-            with open(filepath, 'w') as f:
-                json.dump(self.collections[collection_name], f, indent=2)
+        with self.tenant.lock:
+            if self.tenant.dropped:
+                return
+            for collection_name in self.collections:
+                self.write_collection_file(collection_name)
                 
     def save_collection_data(self, collection_name):
         """Save data for a specific collection (deprecated - use save_all_collections)"""
         self.save_all_collections()
             
+    def snapshot(self, name=None):
+        """Capture the current state of all collections and return the snapshot name"""
+        if name is None:
+            name = str(uuid.uuid4())
+        if not is_valid_name(name):
+            raise ValueError(f"Invalid snapshot name: {name!r}")
+            
+        with self.tenant.lock:
+            # Share the collection objects; they are copied on their next write
+            self.snapshots[name] = dict(self.collections)
+            self.shared_collections = set(self.collections)
+            self.tenant.owned_items = {}
+        return name
+        
+    def drop_snapshot(self, name):
+        """Delete a snapshot so the data only it references can be freed"""
+        with self.tenant.lock:
+            del self.snapshots[name]
+        
+    def restore(self, name):
+        """Roll all collections back to a snapshot taken with snapshot()"""
+        snapshot = self.snapshots[name]
+        with self.tenant.lock:
+            previous = self.collections
+            self.collections = dict(snapshot)
+            self.shared_collections = set(snapshot)
+            self.tenant.owned_items = {}
+            
+            # Only rewrite files for collections that changed since the snapshot
+            for collection_name in previous:
+                if collection_name not in snapshot:
+                    filepath = os.path.join(self.data_dir, f"{collection_name}.json")
+                    if os.path.exists(filepath):
+                        os.remove(filepath)
+            for collection_name in snapshot:
+                if previous.get(collection_name) is not snapshot[collection_name]:
+                    self.write_collection_file(collection_name)
+            
+    def setup_recording(self, path):
+        """Append every request to a JSON lines log that `crudrex replay` can play back"""
+        # Only needed when recording, so they stay off the default boot path
+        import hashlib
+        from urllib.parse import quote
+        
+        self.record_file = open(path, 'a', buffering=1)
+        self.record_lock = threading.Lock()
+        self.record_started = time.perf_counter()
+        # Request times restart at 0 for every recording, so mark where this one begins
+        self.record_file.write(json.dumps({
+            "session": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        }) + "\n")
+        
+        @self.app.before_request
+        def start_timer():
+            g.record_start = time.perf_counter()
+            
+        @self.app.after_request
+        def record_request(response):
+            if request.path == '/_ready':
+                return response
+                
+            now = time.perf_counter()
+            start = g.get('record_start', now)
+            # Record the URI as sent by the client so it can be replayed verbatim
+            path = request.environ.get('RAW_URI') or request.environ.get('REQUEST_URI')
+            if not path:
+                path = quote(request.script_root + request.path)
+                if request.query_string:
+                    path += '?' + request.query_string.decode('latin-1')
+            entry = {
+                "t": round(start - self.record_started, 4),
+                "method": request.method,
+                "path": path,
+                "status": response.status_code,
+                "ms": round((now - start) * 1000, 3)
+            }
+            if not response.direct_passthrough:
+                entry["hash"] = hashlib.sha1(response.get_data()).hexdigest()[:16]
+            body = request.get_data(as_text=True)
+            if body:
+                entry["body"] = body
+            tenant = request.headers.get('X-Crudrex-Tenant')
+            if tenant:
+                entry["tenant"] = tenant
+                
+            line = json.dumps(entry, separators=(',', ':'))
+            with self.record_lock:
+                self.record_file.write(line + '\n')
+            return response
+            
     def setup_routes(self):
         """Setup all routes for the server"""
         # ALWAYS allow OPTIONS (CORS preflight fix)
@@ -63,6 +366,34 @@ class MockServer:
         def allow_options():
             if request.method == 'OPTIONS':
                 return '', 200
+                
+        @self.app.before_request
+        def resolve_tenant():
+            name = request.environ.get('crudrex.tenant')
+            if name and not is_valid_name(name):
+                return jsonify({"error": "Invalid tenant name"}), 400
+            g.tenant = self.get_tenant(name) if name else self.default_tenant
+            
+            # Tenant management waits on other tenants' locks, so it must not hold one.
+            # Reads of a tenant run together; changes and saves run one at a time.
+            if not request.path.startswith('/_tenants'):
+                if request.method in ('GET', 'HEAD'):
+                    g.tenant.lock.acquire_shared()
+                    g.tenant_lock = 'shared'
+                else:
+                    g.tenant.lock.acquire()
+                    g.tenant_lock = 'exclusive'
+                
+            # Requests that were waiting while the tenant was deleted must not recreate it
+            if g.tenant.dropped:
+                return jsonify({"error": "Tenant not found"}), 404
+            
+        @self.app.teardown_request
+        def release_tenant(exc):
+            if g.get('tenant_lock') == 'shared':
+                g.tenant.lock.release_shared()
+            elif g.get('tenant_lock') == 'exclusive':
+                g.tenant.lock.release()
 
         # Main page route
         @self.app.route('/', methods=['GET'])
@@ -76,9 +407,72 @@ class MockServer:
                 "message": "Mock JSON Server is running",
                 "collections": list(self.collections.keys()),
                 "instructions": "Create a new collection by POSTing to /collections/",
-                "port": self.port
+                "port": self.port,
+                "tenant": self.tenant.name
             })
             
+        # Readiness probe: loads the default collections if needed and reports the result
+        @self.app.route('/_ready', methods=['GET'])
+        def ready_handler():
+            if self.load_error is None:
+                try:
+                    self.load_tenant(self.default_tenant)
+                except Exception:
+                    pass  # Stored in self.load_error
+            if self.load_error is not None:
+                return jsonify({"ready": False, "error": f"Failed to load collections: {self.load_error}"}), 500
+                
+            result = {"ready": True, "startupMs": round(self.startup_ms, 1)}
+            if self.startup_budget_ms is not None:
+                result["startupBudgetMs"] = self.startup_budget_ms
+                result["withinBudget"] = self.startup_ms <= self.startup_budget_ms
+            return jsonify(result)
+            
+        @self.app.route('/_tenants', methods=['GET'])
+        def tenants_handler():
+            return jsonify({"tenants": list(self.tenants.keys())})
+            
+        @self.app.route('/_tenants/<name>', methods=['DELETE'])
+        def drop_tenant_handler(name):
+            if not is_valid_name(name):
+                return jsonify({"error": "Invalid tenant name"}), 400
+                
+            try:
+                self.drop_tenant(name)
+            except KeyError:
+                return jsonify({"error": "Tenant not found"}), 404
+            return jsonify({"message": f"Tenant '{name}' deleted"})
+            
+        # Snapshot routes for fast state reset between tests
+        @self.app.route('/_snapshot', methods=['GET', 'POST'])
+        def snapshot_handler():
+            if request.method == 'GET':
+                return jsonify({"snapshots": list(self.snapshots.keys())})
+            elif request.method == 'POST':
+                data = request.get_json(force=True, silent=True) or {}
+                name = data.get('name') if isinstance(data, dict) else None
+                if name is not None and not is_valid_name(name):
+                    return jsonify({"error": "Snapshot name may only contain letters, digits, '-' and '_'"}), 400
+                    
+                name = self.snapshot(name)
+                return jsonify({"message": f"Snapshot '{name}' created", "name": name}), 201
+                
+        @self.app.route('/_snapshot/<name>', methods=['DELETE'])
+        def drop_snapshot_handler(name):
+            if name not in self.snapshots:
+                return jsonify({"error": "Snapshot not found"}), 404
+                
+            self.drop_snapshot(name)
+            return jsonify({"message": f"Snapshot '{name}' deleted"})
+            
+        @self.app.route('/_restore/<name>', methods=['POST'])
+        def restore_handler(name):
+            if name not in self.snapshots:
+                return jsonify({"error": "Snapshot not found"}), 404
+                
+            self.restore(name)
+            return jsonify({"message": f"Snapshot '{name}' restored"})
+            
         # Collection management routes
         @self.app.route('/collections/', methods=['GET', 'POST'])
         def collections_handler():
@@ -93,7 +487,10 @@ class MockServer:
                 if collection_name in self.collections:
                     return jsonify({"error": "Collection already exists"}), 400
                     
-                self.collections[collection_name] = {}
+                if self.collection_quota_reached():
+                    return jsonify({"error": "Tenant collection quota exceeded"}), 403
+                    
+                self.collections[collection_name] = self.new_collection()
                 self.save_collection_data(collection_name)
                 return jsonify({"message": f"Collection '{collection_name}' created"}), 201
             
@@ -109,7 +506,10 @@ class MockServer:
             if collection_name in self.collections:
                 return jsonify({"error": "Collection already exists"}), 400
                 
-            self.collections[collection_name] = {}
+            if self.collection_quota_reached():
+                return jsonify({"error": "Tenant collection quota exceeded"}), 403
+                
+            self.collections[collection_name] = self.new_collection()
             self.save_collection_data(collection_name)
             return jsonify({"message": f"Collection '{collection_name}' created"}), 201
             
@@ -122,7 +522,7 @@ class MockServer:
                     
                 # Support query parameters for filtering
                 items = []
-                for key, value in self.collections[collection_name].items():
+                for key, value in list(self.collections[collection_name].items()):
                     # Simple filtering support
                     match = True
                     for filter_key, filter_value in request.args.items():
@@ -136,7 +536,9 @@ class MockServer:
             elif request.method == 'POST':
                 if collection_name not in self.collections:
                     # Auto-create collection if it doesn't exist
-                    self.collections[collection_name] = {}
+                    if self.collection_quota_reached():
+                        return jsonify({"error": "Tenant collection quota exceeded"}), 403
+                    self.collections[collection_name] = self.new_collection()
                     
                 data = request.get_json(force=True)
                 if not data:
@@ -147,7 +549,7 @@ class MockServer:
                     data['id'] = str(uuid.uuid4())
                     
                 # Store with ID as key
-                self.collections[collection_name][data['id']] = data
+                self.writable_collection(collection_name)[data['id']] = data
                 self.save_collection_data(collection_name)
                 return jsonify(data), 201
                 
@@ -157,7 +559,7 @@ class MockServer:
                 
             # Support query parameters for filtering
             items = []
-            for key, value in self.collections[collection_name].items():
+            for key, value in list(self.collections[collection_name].items()):
                 # Simple filtering support
                 match = True
                 for filter_key, filter_value in request.args.items():
@@ -172,7 +574,9 @@ class MockServer:
         def create_item(collection_name):
             if collection_name not in self.collections:
                 # Auto-create collection if it doesn't exist
-                self.collections[collection_name] = {}
+                if self.collection_quota_reached():
+                    return jsonify({"error": "Tenant collection quota exceeded"}), 403
+                self.collections[collection_name] = self.new_collection()
                 
             data = request.get_json()
             if not data:
@@ -183,7 +587,7 @@ class MockServer:
                 data['id'] = str(uuid.uuid4())
                 
             # Store with ID as key
-            self.collections[collection_name][data['id']] = data
+            self.writable_collection(collection_name)[data['id']] = data
             self.save_collection_data(collection_name)
             return jsonify(data), 201
             
@@ -199,14 +603,16 @@ class MockServer:
                 return jsonify(self.collections[collection_name][item_id])
             elif request.method == 'POST':
                 if collection_name not in self.collections:
-                    self.collections[collection_name] = {}
+                    if self.collection_quota_reached():
+                        return jsonify({"error": "Tenant collection quota exceeded"}), 403
+                    self.collections[collection_name] = self.new_collection()
                     
                 data = request.get_json(force=True)
                 if not data:
                     return jsonify({"error": "JSON data required"}), 400
                     
                 data['id'] = item_id
-                self.collections[collection_name][item_id] = data
+                self.writable_collection(collection_name)[item_id] = data
                 self.save_collection_data(collection_name)
                 return jsonify(data), 201
             elif request.method == 'PUT':
@@ -219,7 +625,7 @@ class MockServer:
                     
                 # Update the item
                 data['id'] = item_id  # Ensure ID consistency
-                self.collections[collection_name][item_id] = data
+                self.writable_collection(collection_name)[item_id] = data
                 self.save_collection_data(collection_name)
                 return jsonify(data)
             elif request.method == 'PATCH':
@@ -234,11 +640,13 @@ class MockServer:
                     return jsonify({"error": "JSON data required"}), 400
                     
                 # Partially update the item
+                item = self.writable_item(collection_name, item_id)
                 for key, value in data.items():
-                    self.collections[collection_name][item_id][key] = value
+                    item[key] = value
                     
+                self.collections[collection_name][item_id] = item
                 self.save_collection_data(collection_name)
-                return jsonify(self.collections[collection_name][item_id])
+                return jsonify(item)
             elif request.method == 'DELETE':
                 if collection_name not in self.collections:
                     return jsonify({"error": "Collection not found"}), 404
@@ -246,7 +654,7 @@ class MockServer:
                 if item_id not in self.collections[collection_name]:
                     return jsonify({"error": "Item not found"}), 404
                     
-                deleted_item = self.collections[collection_name].pop(item_id)
+                deleted_item = self.writable_collection(collection_name).pop(item_id)
                 self.save_collection_data(collection_name)
                 return jsonify({"message": "Item deleted", "deleted_item": deleted_item})
                 
@@ -269,7 +677,7 @@ class MockServer:
                 
             # Update the item
             data['id'] = item_id  # Ensure ID consistency
-            self.collections[collection_name][item_id] = data
+            self.writable_collection(collection_name)[item_id] = data
             self.save_collection_data(collection_name)
             return jsonify(data)
             
@@ -285,11 +693,13 @@ class MockServer:
                 return jsonify({"error": "JSON data required"}), 400
                 
             # Partially update the item
+            item = self.writable_item(collection_name, item_id)
             for key, value in data.items():
-                self.collections[collection_name][item_id][key] = value
+                item[key] = value
                 
+            self.collections[collection_name][item_id] = item
             self.save_collection_data(collection_name)
-            return jsonify(self.collections[collection_name][item_id])
+            return jsonify(item)
             
         def delete_item(collection_name, item_id):
             if collection_name not in self.collections:
@@ -298,7 +708,7 @@ class MockServer:
             if item_id not in self.collections[collection_name]:
                 return jsonify({"error": "Item not found"}), 404
                 
-            deleted_item = self.collections[collection_name].pop(item_id)
+            deleted_item = self.writable_collection(collection_name).pop(item_id)
             self.save_collection_data(collection_name)
             return jsonify({"message": "Item deleted", "deleted_item": deleted_item})
             
@@ -316,9 +726,12 @@ class MockServer:
             # Use root collection name (first part of path)
             root_collection = path_parts[0]
             
-            # Ensure root collection exists
-            if root_collection not in self.collections:
-                self.collections[root_collection] = {}
+            # Ensure root collection exists (GET requests only hold the tenant lock shared)
+            with self.tenant.lock:
+                if root_collection not in self.collections:
+                    if self.collection_quota_reached():
+                        return jsonify({"error": "Tenant collection quota exceeded"}), 403
+                    self.collections[root_collection] = self.new_collection()
                 
             # Get current timestamp
             current_time = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
@@ -331,6 +744,12 @@ class MockServer:
                  (len(path_parts[-1]) >= 8 and '-' in path_parts[-1]))  # UUID-like
             )
             
+            # Copy the endpoint data before modifying it if a snapshot shares it
+            if request.method != 'GET':
+                endpoint = '-'.join(path_parts[:-1]) if is_item_operation else path.replace('/', '-')
+                if endpoint in self.writable_collection(root_collection):
+                    self.writable_item(root_collection, endpoint)
+                    
             if is_item_operation:
                 # Handle item-level operations
                 endpoint_key = '-'.join(path_parts[:-1])  # All parts except last
@@ -550,7 +969,7 @@ class MockServer:
         """Run the server"""
         # Suppress only the specific Flask startup messages while keeping access logs
         import sys
-        from werkzeug.serving import WSGIRequestHandler
+        from werkzeug.serving import WSGIRequestHandler, make_server
         from werkzeug.serving import _log
         
         # Override the internal log function to filter out startup messages
@@ -575,11 +994,29 @@ class MockServer:
                 if type == 'info':
                     super().log(type, message, *args)
                     
-        self.app.run(host=host, port=self.port, debug=debug, 
-                    request_handler=CustomRequestHandler)
-        
-        # Restore original log function
-        werkzeug.serving._log = original_log
+        try:
+            if debug:
+                # The debug reloader restarts the process, so load before serving
+                self.load_tenant(self.default_tenant)
+                self.app.run(host=host, port=self.port, debug=debug, 
+                            request_handler=CustomRequestHandler)
+            else:
+                # Bind the port first, then load the default collections while serving
+                self.http_server = make_server(host, self.port, self.app, threaded=True,
+                                               request_handler=CustomRequestHandler)
+                loader = threading.Thread(target=self.load_in_background)
+                loader.daemon = True
+                loader.start()
+                self.http_server.serve_forever()
+                self.http_server.server_close()
+        finally:
+            # Restore original log function
+            werkzeug.serving._log = original_log
+            if self.record_file is not None:
+                self.record_file.close()
+            
+        if self.load_error is not None:
+            raise self.load_error
         
     def run_async(self, host='localhost'):
         """Run the server in a separate thread"""
@@ -590,6 +1027,8 @@ class MockServer:
 
 def main():
     """Main entry point for the server"""
+    import webbrowser
+    
     server = MockServer()
     
     # Open browser after a short delay
@@ -0,0 +1,121 @@
+import json
+import sys
+from collections.abc import MutableMapping
+
+# Value types that can be stored inline in a compact row
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+# Number of items per key table sampled before deciding which string fields to intern
+INTERN_SAMPLE_SIZE = 64
+
+
+class CompactCollection(MutableMapping):
+    """Memory-lean mapping of item ID -> item for large homogeneous collections.
+
+    Flat items (every value a scalar) are stored as a single tuple whose first
+    element is a key table shared by every item with the same keys, followed by
+    the values. Keys are interned, and so are string fields whose values repeat
+(decided per key table from a sample of items), while unique strings such as
+names or UUIDs are left alone. Items are materialized back
+    to plain dicts on lookup, so mutating a returned item does not change the
+    collection - assign it back instead.
+
+    Items with nested values are kept as they are and returned by reference.
+    This includes the json-server style endpoint data stored by nested paths,
+    so those endpoints do not benefit from compact storage.
+    """
+
+    def __init__(self, items=None):
+        self._shapes = {}
+        self._rows = {}
+        # Per key table: tuple of flags for fields to intern, or sampled values while undecided
+        self._intern_fields = {}
+        self._samples = {}
+        if items:
+            self.update(items)
+
+    def _shape(self, keys):
+        """Return the shared key table for the given keys"""
+        keys = tuple(sys.intern(key) for key in keys)
+        return self._shapes.setdefault(keys, keys)
+
+    def _fields_to_intern(self, shape, values):
+        """Return which fields of a key table repeat often enough to intern, or None while sampling"""
+        flags = self._intern_fields.get(shape)
+        if flags is not None:
+            return flags
+        samples = self._samples.setdefault(shape, [0] + [set() for _ in shape])
+        samples[0] += 1
+        for seen, value in zip(samples[1:], values):
+            if type(value) is str:
+                seen.add(value)
+        if samples[0] < INTERN_SAMPLE_SIZE:
+            return None
+        # Intern fields with at most half as many distinct values as sampled items
+        flags = tuple(0 < len(seen) <= INTERN_SAMPLE_SIZE // 2 for seen in samples[1:])
+        self._intern_fields[shape] = flags
+        del self._samples[shape]
+        return flags
+
+    def _pack(self, item_id, item):
+        """Convert an item to its stored form"""
+        if not isinstance(item, dict):
+            return item
+        if not all(isinstance(key, str) for key in item):
+            return item
+        if not all(isinstance(value, SCALAR_TYPES) for value in item.values()):
+            return item
+        shape = self._shape(item.keys())
+        # Reuse the ID string when the item repeats its own ID
+        values = [item_id if value == item_id and type(value) is str else value
+                  for value in item.values()]
+        flags = self._fields_to_intern(shape, values)
+        if flags:
+            values = [sys.intern(value) if flag and type(value) is str else value
+                      for flag, value in zip(flags, values)]
+        return (shape, *values)
+
+    def __getitem__(self, item_id):
+        row = self._rows[item_id]
+        if type(row) is tuple:
+            return dict(zip(row[0], row[1:]))
+        return row
+
+    def __setitem__(self, item_id, item):
+        self._rows[item_id] = self._pack(item_id, item)
+
+    def __delitem__(self, item_id):
+        del self._rows[item_id]
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, item_id):
+        return item_id in self._rows
+
+    def copy(self):
+        """Return a shallow copy that shares the stored rows"""
+        other = CompactCollection()
+        other._shapes = dict(self._shapes)
+        other._rows = dict(self._rows)
+        other._intern_fields = dict(self._intern_fields)
+        return other
+
+    def write_json(self, f):
+        """Write the collection as an indented JSON object, one item at a time
+
+        Produces the same output as json.dump(..., indent=2) without
+        materializing the whole collection in memory.
+        """
+        if not self._rows:
+            f.write('{}')
+            return
+        separator = '{'
+        for item_id in self._rows:
+            item = json.dumps(self[item_id], indent=2).replace('\n', '\n  ')
+            f.write(f'{separator}\n  {json.dumps(item_id)}: {item}')
+            separator = ','
+        f.write('\n}')
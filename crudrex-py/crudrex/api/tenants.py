@@ -0,0 +1,123 @@
+import re
+import threading
+
+# Header and path prefix used to select a tenant
+TENANT_HEADER = 'X-Crudrex-Tenant'
+TENANT_PATH_PREFIX = '/_tenants/'
+
+# Tenant data lives under <data_dir>/_tenants/<name>
+TENANTS_DIR = '_tenants'
+
+# URL and directory safe names, used for tenants and snapshots
+NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def is_valid_name(name):
+    """Check that a tenant or snapshot name is safe to use in URLs and as a directory name"""
+    return isinstance(name, str) and bool(NAME_PATTERN.match(name))
+
+
+class TenantLock:
+    """Reentrant lock that lets reads of a tenant run together while changes run alone
+
+    Use it like an RLock for changes. Reads hold it with acquire_shared() and
+    release_shared(); a read that needs to change the tenant (e.g. to create a
+    missing collection) can take the lock exclusively and gives up its shared
+    hold until it releases it. Waiting changes are served before new reads.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._local = threading.local()
+        self._readers = 0
+        self._writer = None
+        self._depth = 0
+        self._waiting_writers = 0
+
+    def acquire_shared(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._writer is None and not self._waiting_writers)
+            self._readers += 1
+            self._local.reads = getattr(self._local, 'reads', 0) + 1
+
+    def release_shared(self):
+        with self._cond:
+            self._readers -= 1
+            self._local.reads -= 1
+            self._cond.notify_all()
+
+    def acquire(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._depth += 1
+                return True
+            # Give up our own shared hold while waiting, so two upgrading reads can't deadlock
+            reads = getattr(self._local, 'reads', 0)
+            self._readers -= reads
+            self._waiting_writers += 1
+            self._cond.wait_for(lambda: self._writer is None and self._readers == 0)
+            self._waiting_writers -= 1
+            self._writer = me
+            self._depth = 1
+            return True
+
+    def release(self):
+        with self._cond:
+            if self._writer != threading.get_ident():
+                raise RuntimeError("cannot release un-acquired lock")
+            self._depth -= 1
+            if self._depth == 0:
+                self._writer = None
+                self._readers += getattr(self._local, 'reads', 0)
+                self._cond.notify_all()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class Tenant:
+    """An isolated set of collections with its own storage directory"""
+
+    def __init__(self, name, data_dir):
+        self.name = name
+        self.data_dir = data_dir
+        self.collections = {}
+        self.snapshots = {}
+        self.shared_collections = set()
+        # Item IDs copied since their collection was last shared with a snapshot
+        self.owned_items = {}
+        self.lock = TenantLock()
+        self.loaded = False
+        self.loading = False
+        self.dropped = False
+
+
+class TenantMiddleware:
+    """WSGI middleware that reads the tenant from the request header or path prefix
+
+    Requests to /_tenants/<name>/<path> are routed to /<path>, so every
+    regular endpoint is available per tenant. /_tenants/<name> without a
+    trailing path is left alone for tenant management. The resolved name is stored in
+    the WSGI environ under 'crudrex.tenant'.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        tenant = environ.get('HTTP_' + TENANT_HEADER.upper().replace('-', '_'))
+        path = environ.get('PATH_INFO', '')
+        if path.startswith(TENANT_PATH_PREFIX):
+            # /_tenants/<name> on its own is the tenant management endpoint
+            name, slash, rest = path[len(TENANT_PATH_PREFIX):].partition('/')
+            if slash:
+                tenant = name
+                environ['PATH_INFO'] = '/' + rest
+                environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '') + TENANT_PATH_PREFIX + tenant
+        if tenant:
+            environ['crudrex.tenant'] = tenant
+        return self.app(environ, start_response)
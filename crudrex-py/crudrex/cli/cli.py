@@ -1,27 +1,34 @@
 import argparse
 import sys
-import os
-import subprocess
-import signal
-import time
 from pathlib import Path
 
 # Add the parent directory to sys.path to import the api module
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from api.server import MockServer
-import threading
-
 def main():
+    # Dispatch the replay subcommand without importing the server
+    if len(sys.argv) > 1 and sys.argv[1] == 'replay':
+        from cli.replay import main as replay_main
+        return replay_main(sys.argv[2:])
+        
     parser = argparse.ArgumentParser(description='Crudrex - Mock JSON Server')
     parser.add_argument('--port', type=int, default=8085, help='Port to run the server on (default: 8085)')
     parser.add_argument('--data-dir', default='data', help='Directory to store data files (default: data)')
     parser.add_argument('--host', default='localhost', help='Host to run the server on (default: localhost)')
+    parser.add_argument('--compact', action='store_true', help='Store flat collection items in a compact in-memory format')
+    parser.add_argument('--tenant-quota', type=int, default=None, help='Maximum number of collections per tenant (default: unlimited)')
+    parser.add_argument('--record', default=None, help='Record all requests to this log file for `crudrex replay`')
+    parser.add_argument('--startup-budget', type=float, default=None, help='Warn when loading data takes longer than this many milliseconds')
     
     args = parser.parse_args()
     
+    # Import the server only once arguments are parsed so --help stays fast
+    from api.server import MockServer
+    
     try:
-        server = MockServer(data_dir=args.data_dir, port=args.port)
+        server = MockServer(data_dir=args.data_dir, port=args.port, compact=args.compact,
+                            tenant_quota=args.tenant_quota, record=args.record,
+                            startup_budget_ms=args.startup_budget)
         print(f"Crudrex server started at http://{args.host}:{args.port}")
         server.run(host=args.host)
     except KeyboardInterrupt:
@@ -0,0 +1,171 @@
+import argparse
+import hashlib
+import json
+import math
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+# Characters left as they are when quoting recorded paths, so encoded URIs pass through unchanged
+SAFE_URI_CHARS = "/?&=%:;@!$'()*+,~"
+
+
+def load_log(path):
+    """Read recorded requests from a log written by MockServer(record=...)"""
+    entries = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    return entries
+
+
+def send(target, entry):
+    """Send one recorded request and return (status, body hash), or (None, error) on failure"""
+    try:
+        body = entry.get('body')
+        req = urllib.request.Request(
+            target + urllib.parse.quote(entry['path'], safe=SAFE_URI_CHARS),
+            data=body.encode('utf-8') if body is not None else None,
+            method=entry['method']
+        )
+        if body is not None:
+            req.add_header('Content-Type', 'application/json')
+        if entry.get('tenant'):
+            req.add_header('X-Crudrex-Tenant', entry['tenant'])
+
+        try:
+            with urllib.request.urlopen(req) as response:
+                return response.status, body_hash(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, body_hash(e.read())
+    except Exception as e:
+        return None, str(e)
+
+
+def body_hash(data):
+    """Short hash of a response body, matching the one stored by the recorder"""
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def replay(entries, target, speed=1.0):
+    """Replay recorded requests against a server and return a summary
+
+    speed scales the recorded timing: 1.0 replays at the original pace,
+    2.0 twice as fast, and 0 sends requests back to back. Each recording
+    session in the log starts its own timeline.
+    """
+    target = target.rstrip('/')
+    latencies = []
+    divergent = []
+    body_divergent = []
+    errors = []
+    start = time.perf_counter()
+    requests = [entry for entry in entries if 'session' not in entry]
+    session_start = None
+
+    for entry in entries:
+        if 'session' in entry:
+            session_start = None
+            continue
+        if session_start is None:
+            # Times in a new session are relative to its first request
+            session_start = (entry.get('t', 0), time.perf_counter())
+        if speed > 0:
+            first, started_at = session_start
+            delay = (entry.get('t', 0) - first) / speed - (time.perf_counter() - started_at)
+            if delay > 0:
+                time.sleep(delay)
+
+        sent_at = time.perf_counter()
+        status, result = send(target, entry)
+        if status is not None:
+            latencies.append((time.perf_counter() - sent_at) * 1000)
+
+        if status is None:
+            errors.append({"method": entry['method'], "path": entry['path'], "error": result})
+        elif status != entry.get('status'):
+            divergent.append({
+                "method": entry['method'],
+                "path": entry['path'],
+                "recorded": entry.get('status'),
+                "replayed": status
+            })
+        elif 'hash' in entry and result != entry['hash']:
+            body_divergent.append({"method": entry['method'], "path": entry['path']})
+
+    recorded = [entry['ms'] for entry in requests if 'ms' in entry]
+    return {
+        "requests": len(requests),
+        "errors": errors,
+        "divergent": divergent,
+        "body_divergent": body_divergent,
+        "duration_s": time.perf_counter() - start,
+        "latency_ms": {
+            "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else 0.0
+        },
+        "recorded_latency_ms": {
+            "mean": sum(recorded) / len(recorded) if recorded else 0.0,
+            "p95": percentile(recorded, 95)
+        }
+    }
+
+
+def print_report(summary):
+    """Print a human readable replay summary"""
+    latency = summary['latency_ms']
+    recorded = summary['recorded_latency_ms']
+    print(f"Replayed {summary['requests']} requests in {summary['duration_s']:.2f}s")
+    print(f"Latency (ms): mean {latency['mean']:.2f}  p50 {latency['p50']:.2f}  "
+          f"p95 {latency['p95']:.2f}  p99 {latency['p99']:.2f}  max {latency['max']:.2f}")
+    print(f"Recorded latency (ms): mean {recorded['mean']:.2f}  p95 {recorded['p95']:.2f}")
+    print(f"Request errors: {len(summary['errors'])}")
+    for item in summary['errors'][:20]:
+        print(f"  {item['method']} {item['path']}: {item['error']}")
+    print(f"Status divergences: {len(summary['divergent'])}")
+    for item in summary['divergent'][:20]:
+        print(f"  {item['method']} {item['path']}: recorded {item['recorded']}, replayed {item['replayed']}")
+    print(f"Body divergences (same status, different response): {len(summary['body_divergent'])}")
+    for item in summary['body_divergent'][:20]:
+        print(f"  {item['method']} {item['path']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='crudrex replay', description='Replay recorded Crudrex traffic against a server')
+    parser.add_argument('log', help='Request log written with --record')
+    parser.add_argument('--target', default='http://localhost:8085', help='Server to replay against (default: http://localhost:8085)')
+    parser.add_argument('--speed', type=float, default=1.0, help='Timing scale: 1 = original, 2 = twice as fast, 0 = as fast as possible (default: 1)')
+    parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+    parser.add_argument('--strict', action='store_true', help='Also fail when response bodies differ from the recording')
+
+    args = parser.parse_args(argv)
+
+    try:
+        entries = load_log(args.log)
+    except (OSError, ValueError) as e:
+        print(f"Error reading log: {e}")
+        sys.exit(1)
+
+    summary = replay(entries, args.target, speed=args.speed)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_report(summary)
+    failed = summary['errors'] or summary['divergent'] or (args.strict and summary['body_divergent'])
+    sys.exit(1 if failed else 0)
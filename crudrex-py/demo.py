@@ -28,11 +28,23 @@ def demo():
     server_thread.daemon = True
     server_thread.start()
     
+    base_url = "http://localhost:8087"
+    
     # Wait for server to start
     print("⏳ Starting server on http://localhost:8087...")
-    time.sleep(2)
-    
-    base_url = "http://localhost:8087"
+    for _ in range(100):
+        try:
+            response = requests.get(f"{base_url}/_ready")
+            if response.status_code == 200:
+                break
+            print(f"❌ Server failed to load its data: {response.json().get('error')}")
+            return False
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.05)
+    else:
+        print("❌ Server did not become ready in time")
+        return False
     
     try:
         # Open browser to show the web interface
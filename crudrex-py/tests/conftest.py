@@ -0,0 +1,13 @@
+import pytest
+
+from crudrex.api.server import MockServer
+
+
+@pytest.fixture(params=[False, True], ids=['dict', 'compact'])
+def server(request, tmp_path):
+    return MockServer(data_dir=str(tmp_path / 'data'), compact=request.param)
+
+
+@pytest.fixture
+def client(server):
+    return server.app.test_client()
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from crudrex.api.server import MockServer
+from crudrex.cli.replay import load_log, percentile, replay
+
+# Nothing listens here, so every replayed request fails to connect
+UNREACHABLE = 'http://127.0.0.1:9'
+
+
+@pytest.mark.parametrize('pct, expected', [(40, 2), (50, 2), (90, 3), (99, 3), (100, 3), (1, 1)])
+def test_percentile_is_nearest_rank(pct, expected):
+    assert percentile([3, 1, 2], pct) == expected
+
+
+def test_recording_starts_a_session(tmp_path):
+    log = tmp_path / 'traffic.jsonl'
+    for _ in range(2):
+        server = MockServer(data_dir=str(tmp_path / 'data'), record=str(log))
+        server.app.test_client().post('/collections/', json={'name': 'users'})
+        server.record_file.close()
+
+    entries = load_log(log)
+    assert ['session' in entry for entry in entries] == [True, False, True, False]
+    assert entries[1]['method'] == 'POST'
+    assert json.loads(entries[1]['body']) == {'name': 'users'}
+
+
+def test_replay_restarts_timing_for_each_session():
+    entries = [
+        {'session': 'a'}, {'t': 10.0, 'method': 'GET', 'path': '/'},
+        {'session': 'b'}, {'t': 0.0, 'method': 'GET', 'path': '/'},
+        {'t': 0.2, 'method': 'GET', 'path': '/'},
+    ]
+    summary = replay(entries, UNREACHABLE)
+
+    assert summary['requests'] == 3
+    assert 0.2 <= summary['duration_s'] < 5
+
+
+def test_failed_requests_are_left_out_of_latency():
+    summary = replay([{'t': 0, 'method': 'GET', 'path': '/'}], UNREACHABLE, speed=0)
+
+    assert len(summary['errors']) == 1
+    assert summary['latency_ms']['max'] == 0.0
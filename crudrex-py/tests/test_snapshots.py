@@ -0,0 +1,90 @@
+import pytest
+
+from crudrex.api.server import MockServer
+
+NESTED = '/shop/orders/recent'
+
+
+@pytest.fixture
+def fixtures(client):
+    """Flat and nested data captured in the 'base' snapshot"""
+    client.post('/collections/', json={'name': 'users'})
+    alice = client.post('/users/', json={'name': 'alice', 'age': 30}).get_json()
+    bob = client.post('/users/', json={'name': 'bob', 'age': 40}).get_json()
+    order = client.post(NESTED, json={'total': 10}).get_json()
+    client.post('/_snapshot', json={'name': 'base'})
+    return {'alice': alice, 'bob': bob, 'order': order}
+
+
+def state(client):
+    return {
+        'users': sorted(client.get('/users/').get_json(), key=lambda item: item['name']),
+        'nested': client.get(NESTED).get_json(),
+    }
+
+
+@pytest.mark.parametrize('method, path, body', [
+    ('PATCH', '/users/{alice}', {'age': 31}),
+    ('PUT', '/users/{alice}', {'name': 'alice2'}),
+    ('DELETE', '/users/{alice}', None),
+    ('POST', '/users/', {'name': 'carol'}),
+    ('PATCH', NESTED + '/{order}', {'data': {'total': 99}}),
+    ('PUT', NESTED + '/{order}', {'total': 50}),
+    ('DELETE', NESTED + '/{order}', None),
+    ('POST', NESTED, {'total': 20}),
+    ('PUT', NESTED, {'items': []}),
+    ('DELETE', NESTED, None),
+])
+def test_restore_undoes_change(client, server, fixtures, method, path, body):
+    expected = state(client)
+    path = path.format(alice=fixtures['alice']['id'], order=fixtures['order']['id'])
+
+    response = client.open(path, method=method, json=body)
+    assert response.status_code < 400
+    assert state(client) != expected
+
+    assert client.post('/_restore/base').status_code == 200
+    assert state(client) == expected
+
+
+def test_snapshot_is_not_changed_by_later_writes(client, server, fixtures):
+    alice_id = fixtures['alice']['id']
+    order_id = fixtures['order']['id']
+    client.patch(f'/users/{alice_id}', json={'age': 99})
+    client.patch(f'{NESTED}/{order_id}', json={'data': {'total': 99}})
+
+    snapshot = server.snapshots['base']
+    assert snapshot['users'][alice_id]['age'] == 30
+    assert snapshot['shop']['shop-orders-recent']['items'][0]['data'] == {'total': 10}
+
+
+def test_restore_can_be_repeated(client, fixtures):
+    expected = state(client)
+    alice_id = fixtures['alice']['id']
+    for age in (31, 32):
+        client.patch(f'/users/{alice_id}', json={'age': age})
+        client.post('/_restore/base')
+        assert state(client) == expected
+
+
+def test_restore_is_persisted(client, server, fixtures, tmp_path):
+    expected = state(client)
+    client.delete('/users/' + fixtures['bob']['id'])
+    client.post('/collections/', json={'name': 'extra'})
+    client.post('/_restore/base')
+
+    reloaded = MockServer(data_dir=str(tmp_path / 'data')).app.test_client()
+    assert state(reloaded) == expected
+    assert 'extra' not in reloaded.get('/collections/').get_json()['collections']
+
+
+@pytest.mark.parametrize('name', [5, '', 'a/b', '../x'])
+def test_invalid_snapshot_name_is_rejected(client, name):
+    assert client.post('/_snapshot', json={'name': name}).status_code == 400
+
+
+def test_drop_snapshot(client, fixtures):
+    assert client.delete('/_snapshot/base').status_code == 200
+    assert client.get('/_snapshot').get_json() == {'snapshots': []}
+    assert client.post('/_restore/base').status_code == 404
+    assert client.delete('/_snapshot/base').status_code == 404
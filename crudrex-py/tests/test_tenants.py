@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+
+import pytest
+
+from crudrex.api.server import MockServer
+
+TENANT = {'X-Crudrex-Tenant': 'shard-1'}
+NESTED = '/shop/orders/recent'
+
+
+@pytest.fixture
+def base(client):
+    """Default collections that new tenants start from"""
+    client.post('/collections/', json={'name': 'users'})
+    alice = client.post('/users/', json={'name': 'alice'}).get_json()
+    order = client.post(NESTED, json={'total': 10}).get_json()
+    return {'alice': alice['id'], 'order': order['id']}
+
+
+def test_tenant_starts_from_default_collections(client, base):
+    assert client.get(f"/users/{base['alice']}", headers=TENANT).get_json()['name'] == 'alice'
+
+
+def test_tenant_changes_do_not_leak_to_default(client, base):
+    client.patch(f"/users/{base['alice']}", json={'name': 'tenant'}, headers=TENANT)
+    client.patch(f"{NESTED}/{base['order']}", json={'data': {'total': 1}}, headers=TENANT)
+
+    assert client.get(f"/users/{base['alice']}").get_json()['name'] == 'alice'
+    assert client.get(NESTED).get_json()['items'][0]['data'] == {'total': 10}
+
+
+def test_default_changes_do_not_leak_to_tenant(client, base):
+    # Load the tenant first so it shares the default collections
+    client.get('/users/', headers=TENANT)
+    client.patch(f"/users/{base['alice']}", json={'name': 'default'})
+    client.patch(f"{NESTED}/{base['order']}", json={'data': {'total': 1}})
+
+    assert client.get(f"/users/{base['alice']}", headers=TENANT).get_json()['name'] == 'alice'
+    assert client.get(NESTED, headers=TENANT).get_json()['items'][0]['data'] == {'total': 10}
+
+
+def test_tenants_are_isolated_from_each_other(client, base):
+    client.post('/users/', json={'name': 'only-in-shard-2'}, headers={'X-Crudrex-Tenant': 'shard-2'})
+
+    names = {item['name'] for item in client.get('/users/', headers=TENANT).get_json()}
+    assert names == {'alice'}
+
+
+def test_path_prefix_selects_tenant(client, base):
+    client.patch(f"/_tenants/shard-1/users/{base['alice']}", json={'name': 'tenant'})
+
+    assert client.get(f"/users/{base['alice']}", headers=TENANT).get_json()['name'] == 'tenant'
+    assert client.get(f"/users/{base['alice']}").get_json()['name'] == 'alice'
+
+
+def test_tenant_snapshots_are_separate(client, base):
+    client.post('/_snapshot', json={'name': 'tenant-base'}, headers=TENANT)
+
+    assert client.get('/_snapshot').get_json() == {'snapshots': []}
+    assert client.get('/_snapshot', headers=TENANT).get_json() == {'snapshots': ['tenant-base']}
+
+
+def test_seeded_tenant_keeps_fixtures_after_restart(client, base, tmp_path):
+    client.get('/users/', headers=TENANT)
+
+    reloaded = MockServer(data_dir=str(tmp_path / 'data')).app.test_client()
+    collections = reloaded.get('/collections/', headers=TENANT).get_json()['collections']
+    assert sorted(collections) == ['shop', 'users']
+
+
+def test_tenant_directory_is_created_on_first_write(client, base, tmp_path):
+    tenant_dir = tmp_path / 'data' / '_tenants' / 'shard-1'
+    client.get('/users/', headers=TENANT)
+    assert not tenant_dir.exists()
+
+    client.post('/users/', json={'name': 'bob'}, headers=TENANT)
+    assert (tenant_dir / 'users.json').exists()
+
+
+def test_quota_counts_only_own_collections(tmp_path):
+    client = MockServer(data_dir=str(tmp_path / 'data'), tenant_quota=1).app.test_client()
+    client.post('/collections/', json={'name': 'users'})
+    client.post('/collections/', json={'name': 'orders'})
+
+    assert client.post('/collections/', json={'name': 'mine'}, headers=TENANT).status_code == 201
+    assert client.post('/collections/', json={'name': 'more'}, headers=TENANT).status_code == 403
+
+
+def test_drop_tenant_removes_data(client, base, tmp_path):
+    client.post('/users/', json={'name': 'bob'}, headers=TENANT)
+
+    assert client.delete('/_tenants/shard-1').status_code == 200
+    assert not os.path.exists(tmp_path / 'data' / '_tenants' / 'shard-1')
+    assert client.delete('/_tenants/shard-1').status_code == 404
+
+    names = {item['name'] for item in client.get('/users/', headers=TENANT).get_json()}
+    assert names == {'alice'}
+
+
+def test_invalid_tenant_name_is_rejected(client):
+    assert client.get('/users/', headers={'X-Crudrex-Tenant': '../x'}).status_code == 400
+    assert client.delete('/_tenants/..').status_code in (400, 404)
+
+
+def test_request_waiting_on_dropped_tenant_is_rejected(client, server, base, tmp_path):
+    tenant = server.get_tenant('shard-1')
+    responses = []
+    with tenant.lock:
+        writer = threading.Thread(target=lambda: responses.append(
+            client.post('/users/', json={'name': 'late'}, headers=TENANT)))
+        writer.start()
+        time.sleep(0.1)
+        server.drop_tenant('shard-1')
+    writer.join()
+
+    assert responses[0].status_code == 404
+    assert not os.path.exists(tmp_path / 'data' / '_tenants' / 'shard-1')
+
+
+def test_reads_share_the_tenant_lock(client, server, base):
+    server.default_tenant.lock.acquire_shared()
+    try:
+        # Another read can go ahead while this one holds the lock
+        reader = threading.Thread(target=lambda: client.get('/users/'))
+        reader.start()
+        reader.join(timeout=2)
+        assert not reader.is_alive()
+    finally:
+        server.default_tenant.lock.release_shared()